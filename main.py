@@ -7,6 +7,8 @@
 # - Proper mixer init and graceful audio handling
 # - FPS limited to 60, improved pause/mute/restart controls
 # - Same general gameplay & variables preserved
+# - Adaptive quality: offscreen render resolution scaled to any window size /
+#   fullscreen, driven by a frame-budget governor (see FrameBudgetGovernor)
 
 import pygame
 import random
@@ -14,14 +16,35 @@ import math
 from pygame import mixer
 import time
 import os
+import argparse
+import logging
+from collections import deque
 from typing import Optional
 
+log = logging.getLogger("space_invaders")
+
 # -------------------------------
 # game constants
 # -------------------------------
 WIDTH = 800
 HEIGHT = 600
 TARGET_FPS = 60
+FRAME_BUDGET = 1.0 / TARGET_FPS
+
+# quality levels, best first. The governor steps through them by index.
+#   render_scale: internal render resolution relative to WIDTH x HEIGHT
+#   smooth: smoothscale (vs nearest) when upscaling the canvas to the window
+#   stars: starfield particle budget (the starfield is opt-in, see --starfield)
+#   bg_layers: 2 = image + starfield, 1 = image only, 0 = flat color
+#   hud_interval: redraw the HUD every N frames
+QUALITY_LEVELS = [
+    {"name": "ultra",   "render_scale": 1.0,  "smooth": True,  "stars": 120, "bg_layers": 2, "hud_interval": 1},
+    {"name": "high",    "render_scale": 1.0,  "smooth": True,  "stars": 60,  "bg_layers": 2, "hud_interval": 2},
+    {"name": "medium",  "render_scale": 0.75, "smooth": True,  "stars": 30,  "bg_layers": 2, "hud_interval": 4},
+    {"name": "low",     "render_scale": 0.5,  "smooth": False, "stars": 0,   "bg_layers": 1, "hud_interval": 8},
+    {"name": "minimal", "render_scale": 0.5,  "smooth": False, "stars": 0,   "bg_layers": 0, "hud_interval": 15},
+]
+MAX_STARS = max(q["stars"] for q in QUALITY_LEVELS)
 
 # -------------------------------
 # global game state
@@ -63,9 +86,227 @@ except Exception:
     # if mixer fails (e.g., no audio device), continue without sounds
     pass
 
-window = pygame.display.set_mode((WIDTH, HEIGHT))
+window = pygame.display.set_mode((WIDTH, HEIGHT), pygame.RESIZABLE)
 pygame.display.set_caption("Space Invaders (fixed)")
 
+# -------------------------------
+# render targets & quality state
+# -------------------------------
+# Game logic always works in logical WIDTH x HEIGHT coordinates. Sprites are
+# drawn onto `canvas` (logical size * render_scale), which is then scaled into
+# `viewport` (the letterboxed 4:3 area of the window). HUD text is rendered
+# straight at viewport scale into `hud_items` and blitted on top, so it stays
+# sharp whatever the render scale and costs only a few small blits per frame.
+quality_level = 0
+render_scale = 1.0
+smooth_upscale = True
+starfield_enabled = False
+star_budget = MAX_STARS
+background_layers = 2
+hud_interval = 1
+hud_frame_counter = 0
+hud_stale = True
+hud_items: list = []  # (text surface, window rect), rebuilt by refresh_hud()
+overlay_message: Optional[str] = None
+
+fullscreen = False
+windowed_size = (WIDTH, HEIGHT)
+
+canvas = pygame.Surface((WIDTH, HEIGHT)).convert()
+viewport = pygame.Rect(0, 0, WIDTH, HEIGHT)
+viewport_scale = 1.0
+viewport_surface = window.subsurface(viewport)
+_scaled_sprites: dict = {}
+
+def update_viewport():
+    """
+    Recompute the letterboxed viewport after the window changed size/mode.
+    """
+    global window, viewport, viewport_scale, viewport_surface, hud_stale
+    window = pygame.display.get_surface()
+    ww, wh = window.get_size()
+    scale = min(ww / WIDTH, wh / HEIGHT)
+    w, h = max(1, int(WIDTH * scale)), max(1, int(HEIGHT * scale))
+    viewport = pygame.Rect((ww - w) // 2, (wh - h) // 2, w, h)
+    viewport_surface = window.subsurface(viewport)
+    window.fill((0, 0, 0))  # letterbox bars, never drawn over afterwards
+    if scale != viewport_scale:
+        viewport_scale = scale
+        load_fonts(scale)
+    hud_stale = True
+
+def set_display_mode(size: tuple[int, int], full: bool = False):
+    global fullscreen, windowed_size
+    fullscreen = full
+    windowed_size = size
+    if full:
+        pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+    else:
+        pygame.display.set_mode(size, pygame.RESIZABLE)
+    update_viewport()
+    if governor is not None:
+        governor.skip_frame()
+
+def toggle_fullscreen():
+    set_display_mode(windowed_size, not fullscreen)
+
+def apply_quality(index: int):
+    """
+    Switch every quality knob to QUALITY_LEVELS[index].
+    """
+    global quality_level, render_scale, smooth_upscale, star_budget, background_layers
+    global hud_interval, hud_stale, canvas
+    q = QUALITY_LEVELS[index]
+    quality_level = index
+    smooth_upscale = q["smooth"]
+    star_budget = q["stars"]
+    background_layers = q["bg_layers"]
+    hud_interval = q["hud_interval"]
+    hud_stale = True
+    if q["render_scale"] != render_scale:
+        render_scale = q["render_scale"]
+        size = (max(1, int(WIDTH * render_scale)), max(1, int(HEIGHT * render_scale)))
+        canvas = pygame.Surface(size).convert()
+        _scaled_sprites.clear()
+
+def draw_sprite(surface, img, x, y):
+    """
+    Blit a sprite given in logical coordinates onto the (possibly downscaled) canvas.
+    Scaled copies are cached per sprite until the render scale changes.
+    """
+    if render_scale == 1.0:
+        surface.blit(img, (x, y))
+        return
+    scaled = _scaled_sprites.get(img)
+    if scaled is None:
+        w, h = img.get_size()
+        scaled = pygame.transform.smoothscale(img, (max(1, int(w * render_scale)), max(1, int(h * render_scale))))
+        _scaled_sprites[img] = scaled
+    surface.blit(scaled, (int(x * render_scale), int(y * render_scale)))
+
+def present():
+    """
+    Scale the canvas into the viewport, draw the HUD on top and flip the display.
+    """
+    if canvas.get_size() == viewport.size:
+        viewport_surface.blit(canvas, (0, 0))
+    elif smooth_upscale:
+        pygame.transform.smoothscale(canvas, viewport.size, viewport_surface)
+    else:
+        pygame.transform.scale(canvas, viewport.size, viewport_surface)
+
+    for surf, rect in hud_items:
+        window.blit(surf, rect)
+    pygame.display.update()
+
+# -------------------------------
+# frame budget governor
+# -------------------------------
+class FrameBudgetGovernor:
+    """
+    Watches rolling frame times and steps the quality level down when frames
+    overrun the budget, and back up when there is plenty of headroom.
+
+    Hysteresis: downgrade and upgrade use different thresholds, an upgrade needs
+    several consecutive good windows, and every change is followed by a cooldown.
+    A quality step can cut cost by more than the threshold gap, so an upgrade also
+    needs the cost predicted for the better level (scaled by canvas pixel count)
+    to stay under the downgrade threshold. Failed upgrades are remembered too: a
+    downgrade within `probation_frames` of upgrading into a level blocks upgrades
+    to it for `block_frames`, doubling on every failure.
+    """
+    def __init__(self, budget: float, level: int = 0, window_frames: int = 60,
+                 downgrade_ratio: float = 0.9, upgrade_ratio: float = 0.6,
+                 upgrade_windows: int = 3, cooldown_frames: int = 120,
+                 probation_frames: int = 600, block_frames: int = 1800):
+        self.budget = budget
+        self.level = level
+        self.samples = deque(maxlen=window_frames)
+        self.downgrade_ratio = downgrade_ratio
+        self.upgrade_ratio = upgrade_ratio
+        self.upgrade_windows = upgrade_windows
+        self.cooldown_frames = cooldown_frames
+        self.cooldown_left = cooldown_frames
+        self.upgrade_streak = 0
+        self.skip_next = False
+        self.probation_frames = probation_frames
+        self.block_frames = block_frames
+        self.frame = 0
+        self.last_upgrade: Optional[tuple[int, int]] = None  # (level, frame)
+        self.backoff: dict[int, int] = {}
+        self.blocked_until: dict[int, int] = {}
+
+    def average(self) -> float:
+        return sum(self.samples) / len(self.samples) if self.samples else 0.0
+
+    def predicted_cost(self, avg: float, target: int) -> float:
+        # assume the whole frame scales with canvas pixels: pessimistic on purpose
+        ratio = QUALITY_LEVELS[target]["render_scale"] / QUALITY_LEVELS[self.level]["render_scale"]
+        return avg * ratio * ratio
+
+    def skip_frame(self):
+        """
+        Drop the current frame's sample: it contains a deliberate stall
+        (level-up pause, asset reload, game over wait, display mode change).
+        """
+        self.skip_next = True
+
+    def update(self, frame_time: float) -> Optional[int]:
+        """
+        Feed one frame time (seconds). Returns the new level index on a change, else None.
+        """
+        if self.skip_next:
+            self.skip_next = False
+            return None
+        self.frame += 1
+        self.samples.append(frame_time)
+        if self.last_upgrade and self.frame - self.last_upgrade[1] > self.probation_frames:
+            # the upgrade held: forget earlier failures at that level
+            self.backoff.pop(self.last_upgrade[0], None)
+            self.last_upgrade = None
+        if self.cooldown_left > 0:
+            self.cooldown_left -= 1
+            return None
+        if len(self.samples) < self.samples.maxlen:
+            return None
+
+        avg = self.average()
+        if avg > self.budget * self.downgrade_ratio and self.level < len(QUALITY_LEVELS) - 1:
+            return self._step(+1, avg)
+        if (avg < self.budget * self.upgrade_ratio and self.level > 0
+                and self.predicted_cost(avg, self.level - 1) < self.budget * self.downgrade_ratio
+                and self.frame >= self.blocked_until.get(self.level - 1, 0)):
+            self.upgrade_streak += 1
+            if self.upgrade_streak >= self.upgrade_windows:
+                return self._step(-1, avg)
+            self.samples.clear()  # each upgrade vote needs a fresh window
+        else:
+            self.upgrade_streak = 0
+        return None
+
+    def _step(self, direction: int, avg: float) -> int:
+        old = self.level
+        self.level += direction
+        if direction < 0:
+            self.last_upgrade = (self.level, self.frame)
+        elif self.last_upgrade and self.last_upgrade[0] == old:
+            # downgraded while still on probation: the upgrade failed
+            block = self.backoff.get(old, self.block_frames // 2) * 2
+            self.backoff[old] = block
+            self.blocked_until[old] = self.frame + block
+            self.last_upgrade = None
+            log.info("upgrade to %s failed, blocked for %d frames", QUALITY_LEVELS[old]["name"], block)
+        self.samples.clear()
+        self.cooldown_left = self.cooldown_frames
+        self.upgrade_streak = 0
+        log.info("quality %s -> %s (avg frame %.2f ms, budget %.2f ms)",
+                 QUALITY_LEVELS[old]["name"], QUALITY_LEVELS[self.level]["name"],
+                 avg * 1000, self.budget * 1000)
+        return self.level
+
+# created in main() unless --fixed-quality
+governor: Optional[FrameBudgetGovernor] = None
+
 # -------------------------------
 # helpers for assets with fallback
 # -------------------------------
@@ -144,8 +385,16 @@ LEFT = RIGHT = UP = SPACE = ENTER = ESC = False
 # -------------------------------
 # UI fonts
 # -------------------------------
-FONT_UI = pygame.font.SysFont("calibri", 16)
-FONT_BIG = pygame.font.SysFont("freesansbold", 64)
+# rebuilt at viewport scale whenever the window size changes
+font_ui: pygame.font.Font
+font_big: pygame.font.Font
+
+def load_fonts(scale: float):
+    global font_ui, font_big
+    font_ui = pygame.font.SysFont("calibri", max(1, round(16 * scale)))
+    font_big = pygame.font.SysFont("freesansbold", max(1, round(64 * scale)))
+
+load_fonts(1.0)
 
 # -------------------------------
 # background & icon
@@ -163,6 +412,30 @@ background_music_paths = [
     "res/sounds/Space_Invaders_Music_x32.ogg",
 ]
 
+# parallax starfield: [x, y, speed]; only the first `star_budget` are used
+stars = [[random.uniform(0, WIDTH), random.uniform(0, HEIGHT), random.uniform(0.3, 1.5)]
+         for _ in range(MAX_STARS)]
+
+def update_stars():
+    if not starfield_enabled:
+        return
+    for star in stars[:star_budget]:
+        star[1] += star[2]
+        if star[1] > HEIGHT:
+            star[0] = random.uniform(0, WIDTH)
+            star[1] = 0.0
+
+def draw_background(surface):
+    if background_layers >= 1:
+        draw_sprite(surface, BACKGROUND_IMG, 0, 0)
+    else:
+        surface.fill((10, 10, 30))
+    if starfield_enabled and background_layers >= 2:
+        size = max(1, int(2 * render_scale))
+        for x, y, speed in stars[:star_budget]:
+            c = int(110 + 95 * speed)
+            surface.fill((c, c, c), (int(x * render_scale), int(y * render_scale), size, size))
+
 def init_background_music():
     idx = min(max(difficulty - 1, 0), 5)
     safe_music_load_and_play(background_music_paths[idx], loop=-1, volume=0.6 if not muted else 0.0)
@@ -182,7 +455,7 @@ class Player:
         self.kill_sound = safe_load_sound(kill_sound_path)
 
     def draw(self, surface):
-        surface.blit(self.img, (self.x, self.y))
+        draw_sprite(surface, self.img, self.x, self.y)
 
 class Enemy:
     def __init__(self, img_path, width, height, x, y, dx, dy, kill_sound_path):
@@ -196,7 +469,7 @@ class Enemy:
         self.kill_sound = safe_load_sound(kill_sound_path)
 
     def draw(self, surface):
-        surface.blit(self.img, (self.x, self.y))
+        draw_sprite(surface, self.img, self.x, self.y)
 
 class Bullet:
     def __init__(self, img_path, width, height, x, y, dx, dy, fire_sound_path):
@@ -212,7 +485,7 @@ class Bullet:
 
     def draw(self, surface):
         if self.fired:
-            surface.blit(self.img, (self.x, self.y))
+            draw_sprite(surface, self.img, self.x, self.y)
 
 class Laser:
     def __init__(self, img_path, width, height, x, y, dx, dy, shoot_probability, relaxation_time, beam_sound_path):
@@ -231,7 +504,7 @@ class Laser:
 
     def draw(self, surface):
         if self.beamed:
-            surface.blit(self.img, (self.x, self.y))
+            draw_sprite(surface, self.img, self.x, self.y)
 
 # created later in init_game()
 player: Player
@@ -260,13 +533,22 @@ def set_sounds_volume(vol: float):
 # -------------------------------
 # HUD / UI
 # -------------------------------
-def scoreboard(surface):
+def hud_text(text, font, pos, color=(255,255,255), center=False):
+    """
+    Render HUD text at viewport scale; `pos` is in logical coordinates.
+    """
+    surf = font.render(text, True, color)
+    at = (viewport.x + int(pos[0] * viewport_scale), viewport.y + int(pos[1] * viewport_scale))
+    rect = surf.get_rect(center=at) if center else surf.get_rect(topleft=at)
+    hud_items.append((surf, rect))
+
+def scoreboard():
     global fps, single_frame_rendering_time
     x, y = 10, 10
     col = (255, 255, 255)
 
     def put(txt, dy):
-        surface.blit(FONT_UI.render(txt, True, col), (x, y + dy))
+        hud_text(txt, font_ui, (x, y + dy), col)
 
     put(f"SCORE : {score}", 0)
     put(f"HI-SCORE : {highest_score}", 20)
@@ -276,13 +558,42 @@ def scoreboard(surface):
 
     # perf
     frame_time_ms = f"{(single_frame_rendering_time*1000):.2f} ms"
-    surface.blit(FONT_UI.render(f"FPS : {fps}", True, col), (WIDTH - 120, 10))
-    surface.blit(FONT_UI.render(f"FT : {frame_time_ms}", True, col), (WIDTH - 120, 30))
+    hud_text(f"FPS : {fps}", font_ui, (WIDTH - 120, 10), col)
+    hud_text(f"FT : {frame_time_ms}", font_ui, (WIDTH - 120, 30), col)
+    hud_text(f"Q : {QUALITY_LEVELS[quality_level]['name']}", font_ui, (WIDTH - 120, 50), col)
 
-def center_text(surface, text, font, color=(255,255,255), y=HEIGHT//2):
-    surf = font.render(text, True, color)
-    rect = surf.get_rect(center=(WIDTH//2, y))
-    surface.blit(surf, rect)
+def center_text(text, font, color=(255,255,255), y=HEIGHT//2):
+    hud_text(text, font, (WIDTH//2, y), color, center=True)
+
+def refresh_hud(force: bool = False):
+    """
+    Re-render the HUD text every `hud_interval` frames (or immediately if forced/stale).
+    """
+    global hud_frame_counter, hud_stale
+    hud_frame_counter += 1
+    if not (force or hud_stale or hud_frame_counter >= hud_interval):
+        return
+    hud_frame_counter = 0
+    hud_stale = False
+    hud_items.clear()
+    scoreboard()
+    if overlay_message:
+        center_text(overlay_message, font_big, (255,255,255), y=HEIGHT//2)
+
+def show_overlay(text: str):
+    """
+    Show the HUD plus a big centered message right away (pause, level up, game over).
+    """
+    global overlay_message
+    overlay_message = text
+    refresh_hud(force=True)
+    present()
+
+def clear_overlay():
+    global overlay_message, hud_stale
+    if overlay_message:
+        overlay_message = None
+        hud_stale = True
 
 # -------------------------------
 # collision
@@ -316,8 +627,7 @@ def level_up():
     max_difficulty_to_level_up = min(max_difficulty_to_level_up, 7)
 
     # brief feedback
-    center_text(window, "LEVEL UP", FONT_BIG, (255,255,255), y=HEIGHT//2)
-    pygame.display.update()
+    show_overlay("LEVEL UP")
     init_game(reset_positions=True)
     time.sleep(0.8)
 
@@ -346,14 +656,14 @@ def rebirth(player_obj: Player):
     player_obj.y = (HEIGHT // 10) * 9 - (player_obj.height // 2)
 
 def gameover_screen():
-    scoreboard(window)
-    center_text(window, "GAME OVER", FONT_BIG, (255,255,255), y=HEIGHT//2)
-    pygame.display.update()
+    show_overlay("GAME OVER")
     safe_music_stop()
     game_over_sound.play()
 
 def gameover():
     global running, score, highest_score
+    if governor is not None:
+        governor.skip_frame()
     if score > highest_score:
         highest_score = score
     running = False
@@ -389,9 +699,7 @@ def destroy_weapons(player_obj: Player, bullet_obj: Bullet, enemy_obj: Enemy, la
 
 def pause_game():
     pause_sound.play()
-    scoreboard(window)
-    center_text(window, "PAUSED", FONT_BIG, (255,255,255), y=HEIGHT//2)
-    pygame.display.update()
+    show_overlay("PAUSED")
     safe_music_pause()
 
 # -------------------------------
@@ -462,9 +770,32 @@ def init_game(reset_positions: bool = False):
         lasers.append(Laser(laser_img_path, laser_width, laser_height, laser_x, laser_y, laser_dx, laser_dy,
                             shoot_probability, relaxation_time, laser_beam_sound_path))
 
+    # new sprite surfaces every init: drop stale scaled copies
+    _scaled_sprites.clear()
+    # asset reload (and the level-up pause around it) is not render cost
+    if governor is not None:
+        governor.skip_frame()
+
     # (re)start music for current difficulty
     init_background_music()
 
+# -------------------------------
+# command line
+# -------------------------------
+def parse_args(argv=None):
+    quality_names = [q["name"] for q in QUALITY_LEVELS]
+    parser = argparse.ArgumentParser(description="Space Invaders")
+    parser.add_argument("--width", type=int, default=WIDTH, help="window width")
+    parser.add_argument("--height", type=int, default=HEIGHT, help="window height")
+    parser.add_argument("--fullscreen", action="store_true", help="start in fullscreen (F11 toggles)")
+    parser.add_argument("--quality", choices=quality_names, default=quality_names[0],
+                        help="starting quality level")
+    parser.add_argument("--fixed-quality", action="store_true",
+                        help="disable the frame-budget governor")
+    parser.add_argument("--starfield", action="store_true",
+                        help="draw a scrolling starfield over the background (scaled by quality)")
+    return parser.parse_args(argv)
+
 # -------------------------------
 # main loop
 # -------------------------------
@@ -472,6 +803,15 @@ def main():
     global running, paused, muted
     global LEFT, RIGHT, UP, SPACE, ENTER, ESC
     global single_frame_rendering_time, total_time, frame_count, fps, life, level
+    global governor, starfield_enabled
+
+    args = parse_args()
+    starfield_enabled = args.starfield
+    set_display_mode((max(1, args.width), max(1, args.height)), args.fullscreen)
+    start_level = [q["name"] for q in QUALITY_LEVELS].index(args.quality)
+    apply_quality(start_level)
+    log.info("quality %s (adaptive: %s)", args.quality, "off" if args.fixed_quality else "on")
+    governor = None if args.fixed_quality else FrameBudgetGovernor(FRAME_BUDGET, level=start_level)
 
     clock = pygame.time.Clock()
 
@@ -487,6 +827,9 @@ def main():
             if event.type == pygame.QUIT:
                 running = False
 
+            elif event.type == pygame.VIDEORESIZE and not fullscreen:
+                set_display_mode(event.size)
+
             elif event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_LEFT:   LEFT = True
                 if event.key == pygame.K_RIGHT:  RIGHT = True
@@ -511,6 +854,8 @@ def main():
                     except Exception:
                         pass
                     set_sounds_volume(vol)
+                if event.key == pygame.K_F11:  # Fullscreen toggle
+                    toggle_fullscreen()
                 if event.key == pygame.K_r:  # Restart
                     # reset global game
                     life = 3
@@ -535,18 +880,20 @@ def main():
             safe_music_unpause()
 
         # ---------------- drawing background ----------------
-        window.blit(BACKGROUND_IMG, (0, 0))
+        draw_background(canvas)
 
         if paused:
             # keep the overlay once, then freeze updates until unpaused
             if not runned_once_pause_overlay:
                 pause_game()
                 runned_once_pause_overlay = True
-            pygame.display.update()
+            refresh_hud()
+            present()
             clock.tick(TARGET_FPS)
             continue
         else:
             runned_once_pause_overlay = False
+            clear_overlay()
 
         # ---------------- gameplay updates ----------------
         # player movement
@@ -564,6 +911,8 @@ def main():
         if bullet.fired:
             bullet.y -= bullet.dy
 
+        update_stars()
+
         # enemies & lasers
         for i in range(len(enemies)):
             # laser beaming
@@ -640,15 +989,15 @@ def main():
                 lasers[i].y = enemies[i].y + lasers[i].height / 2
 
         # ---------------- render ----------------
-        scoreboard(window)
         for lz in lasers:
-            lz.draw(window)
+            lz.draw(canvas)
         for e in enemies:
-            e.draw(window)
-        bullet.draw(window)
-        player.draw(window)
+            e.draw(canvas)
+        bullet.draw(canvas)
+        player.draw(canvas)
 
-        pygame.display.update()
+        refresh_hud()
+        present()
 
         # ---------------- timing / fps ----------------
         frame_time = time.time() - t0
@@ -661,6 +1010,12 @@ def main():
             total_time_acc = 0.0
         main._acc = total_time_acc
 
+        # ---------------- adaptive quality ----------------
+        if governor is not None:
+            new_level = governor.update(frame_time)
+            if new_level is not None:
+                apply_quality(new_level)
+
         clock.tick(TARGET_FPS)
 
     # exit cleanup
@@ -669,4 +1024,5 @@ def main():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
     main()